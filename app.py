@@ -1,17 +1,26 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, send_file, Response, \
+    stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+from sqlalchemy import DDL, event, func, or_, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, load_only
+from sqlalchemy.pool import NullPool
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime, date, timedelta, timezone
+from functools import lru_cache
+from collections import Counter, defaultdict
+import copy
 import csv
+import hashlib
 from io import StringIO, BytesIO
 import os
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
+import threading
+import time
+from types import SimpleNamespace
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'rass-cuisine-secret-key-change-this-in-production')
@@ -32,11 +41,44 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True,
     'pool_recycle': 300,
 }
+if os.environ.get('VERCEL'):
+    # Serverless: each function instance is short-lived, so don't hold idle connections open;
+    # Neon's pooled (pgBouncer) endpoint does the pooling instead
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'poolclass': NullPool}
+elif DATABASE_URL:
+    # Production: size the PostgreSQL pool for concurrent requests (default is 5 + 10 overflow)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        'pool_size': 20,
+        'max_overflow': 40,
+        'pool_timeout': 30,
+    })
+if DATABASE_URL and make_url(DATABASE_URL).get_driver_name() == 'psycopg2':
+    # psycopg2: batch executemany() UPDATEs/DELETEs as well as INSERTs (1000 rows per round-trip)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update({
+        'executemany_mode': 'values_plus_batch',
+        'insertmanyvalues_page_size': 1000,
+    })
 
 db = SQLAlchemy(app)
+migrate = Migrate(app, db, directory=os.path.join(app.root_path, 'migrations'))
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 
+# Password hashing cost, pinned so login latency doesn't change with werkzeug's defaults.
+# scrypt N=2^14, r=8, p=1 is the scrypt paper's interactive-login setting (~35ms, 16MB per hash).
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:16384:8:1')
+
+
+@lru_cache(maxsize=None)
+def _password_hash_prefix():
+    """PASSWORD_HASH_METHOD as werkzeug writes it into stored hashes.
+
+    Shorthand like 'scrypt' or 'pbkdf2:sha256' gets the default cost filled in, so
+    needs_rehash() compares against this. Worked out on first login rather than at
+    import, since it costs a full hash.
+    """
+    return generate_password_hash('', method=PASSWORD_HASH_METHOD).split('$', 1)[0]
+
 
 # Database Models
 class User(UserMixin, db.Model):
@@ -45,42 +87,62 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(200))
 
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=PASSWORD_HASH_METHOD)
 
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    def needs_rehash(self):
+        """True if the stored hash was made with a different method or cost"""
+        return self.password_hash.split('$', 1)[0] != _password_hash_prefix()
+
 
 class Employee(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    designation = db.Column(db.String(100), nullable=False)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    designation = db.Column(db.String(100), nullable=False, index=True)
     salary = db.Column(db.Float, nullable=False)
     join_date = db.Column(db.Date, nullable=False)
     salary_payment_date = db.Column(db.Date, nullable=True)
     total_withdrawn = db.Column(db.Float, default=0)
+    # Remaining salary, computed by the database so queries and aggregates can read it directly
+    balance = db.Column(db.Float, db.Computed('salary - total_withdrawn', persisted=True))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=True)
 
     # CASCADE DELETE - THIS IS THE FIX!
-    transactions = db.relationship('Transaction', backref='employee', lazy=True, cascade='all, delete-orphan')
+    transactions = db.relationship('Transaction', backref='employee', lazy=True, order_by='Transaction.date.desc()',
+                                   cascade='all, delete-orphan')
     attendance_records = db.relationship('Attendance', backref='employee_rel', lazy=True, cascade='all, delete-orphan')
 
+    # Trigram index so the '%search%' filter on the employees page can use an index (PostgreSQL only)
+    __table_args__ = (
+        db.Index('ix_employee_search_trgm', 'name', 'designation', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops', 'designation': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+    )
+
+
+event.listen(Employee.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
 
 class Transaction(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
     amount = db.Column(db.Float, nullable=False)
-    date = db.Column(db.Date, nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
     time = db.Column(db.Time, nullable=True)
     notes = db.Column(db.String(500))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # dashboard's latest withdrawals
+
+    # Serves employee.transactions (filtered by employee, ordered by date) straight from the index
+    __table_args__ = (db.Index('ix_transaction_employee_date', 'employee_id', 'date'),)
 
 
 class Attendance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     employee_id = db.Column(db.Integer, db.ForeignKey('employee.id', ondelete='CASCADE'), nullable=False)
-    date = db.Column(db.Date, nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
     status = db.Column(db.String(20), nullable=False)
     check_in_time = db.Column(db.Time)
     check_out_time = db.Column(db.Time)
@@ -91,9 +153,58 @@ class Attendance(db.Model):
     __table_args__ = (db.UniqueConstraint('employee_id', 'date', name='unique_employee_date'),)
 
 
+EMPLOYEES_PER_PAGE = 50
+
+# Statements for the dashboard and employee list, built once so every request reuses
+# the same statement (and its cached SQL compilation)
+_EMPLOYEES_BY_ID = select(Employee).order_by(Employee.id)
+
+# The dashboard overview only shows these columns
+_DASHBOARD_EMPLOYEES = _EMPLOYEES_BY_ID.options(load_only(
+    Employee.name, Employee.designation, Employee.salary, Employee.total_withdrawn, Employee.balance
+))
+_RECENT_TRANSACTIONS = select(Transaction).order_by(Transaction.created_at.desc()).limit(10)
+_EMPLOYEE_TOTALS = select(
+    func.count(Employee.id),
+    func.coalesce(func.sum(Employee.salary), 0),
+    func.coalesce(func.sum(Employee.total_withdrawn), 0),
+    func.coalesce(func.sum(Employee.balance), 0)
+)
+
+
+# Logged-in users are cached per process for a short while, so authenticated
+# requests don't need a database round-trip just to load current_user.
+# change_password only clears this process's entry; other workers keep serving
+# the old User for up to USER_CACHE_TTL seconds.
+USER_CACHE_TTL = 60
+USER_CACHE_SIZE = 1024
+_USER_CACHE = {}
+_USER_CACHE_LOCK = threading.Lock()  # threaded servers evict from several requests at once
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))
+    user_id = int(user_id)
+    with _USER_CACHE_LOCK:
+        cached = _USER_CACHE.get(user_id)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
+    user = db.session.get(User, user_id)
+    if user:
+        # Detach so the cached object outlives this request's session
+        db.session.expunge(user)
+        now = time.monotonic()
+        with _USER_CACHE_LOCK:
+            _USER_CACHE.pop(user_id, None)
+            if len(_USER_CACHE) >= USER_CACHE_SIZE:
+                # Full: drop expired entries, then the oldest if that wasn't enough
+                for expired_id in [uid for uid, (expires, _) in _USER_CACHE.items() if expires <= now]:
+                    _USER_CACHE.pop(expired_id, None)
+                if len(_USER_CACHE) >= USER_CACHE_SIZE:
+                    _USER_CACHE.pop(next(iter(_USER_CACHE)), None)
+            _USER_CACHE[user_id] = (now + USER_CACHE_TTL, user)
+    return user
 
 
 # Timezone Helper Functions (Pakistan Standard Time = UTC+5)
@@ -102,9 +213,7 @@ PKT = timezone(timedelta(hours=5))
 
 def get_pakistan_time():
     """Get current time in Pakistan timezone (PKT = UTC+5)"""
-    utc_now = datetime.now(timezone.utc)
-    pakistan_time = utc_now.astimezone(PKT)
-    return pakistan_time
+    return datetime.now(PKT)
 
 
 def get_pakistan_datetime():
@@ -114,46 +223,276 @@ def get_pakistan_datetime():
 
 def get_pakistan_date():
     """Get current date in Pakistan timezone"""
-    return get_pakistan_time().date()
+    return datetime.now(PKT).date()
 
 
 def get_pakistan_time_only():
     """Get current time only in Pakistan timezone"""
-    return get_pakistan_time().time()
+    return datetime.now(PKT).time()
+
+
+# Attendance Helper Functions
+def _attendance_counts(start_date, end_date):
+    """Return {employee_id: (present, absent, leave, half_day, total)} days between two dates (inclusive)"""
+    # One row per employee, each status counted with an aggregate FILTER clause
+    rows = db.session.query(
+        Attendance.employee_id,
+        func.count().filter(Attendance.status == 'Present'),
+        func.count().filter(Attendance.status == 'Absent'),
+        func.count().filter(Attendance.status == 'Leave'),
+        func.count().filter(Attendance.status == 'Half-Day'),
+        func.count()
+    ).filter(
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ).group_by(Attendance.employee_id)
+    return {employee_id: tuple(days) for employee_id, *days in rows}
 
 
 # ============================================
 # PDF GENERATION FUNCTIONS
 # ============================================
 
-def generate_withdrawal_slip_pdf(transaction, employee):
-    """Generate a withdrawal slip PDF for a single transaction"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#f97316'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Paragraph and table styles shared by every generated document.
 
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#1f2937'),
-        spaceAfter=12
+    Built on first use rather than at import, so only PDF requests pay for
+    loading ReportLab.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    sheet = getSampleStyleSheet()
+    return SimpleNamespace(
+        sheet=sheet,
+        slip_title=ParagraphStyle(
+            'CustomTitle',
+            parent=sheet['Heading1'],
+            fontSize=24,
+            textColor=colors.HexColor('#f97316'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        slip_heading=ParagraphStyle(
+            'CustomHeading',
+            parent=sheet['Heading2'],
+            fontSize=16,
+            textColor=colors.HexColor('#1f2937'),
+            spaceAfter=12
+        ),
+        report_title=ParagraphStyle(
+            'CustomTitle',
+            parent=sheet['Heading1'],
+            fontSize=20,
+            textColor=colors.HexColor('#f97316'),
+            spaceAfter=20,
+            alignment=TA_CENTER
+        ),
+        all_title=ParagraphStyle(
+            'CustomTitle',
+            parent=sheet['Heading1'],
+            fontSize=22,
+            textColor=colors.HexColor('#f97316'),
+            spaceAfter=20,
+            alignment=TA_CENTER
+        ),
+        slip_info_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        slip_employee_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 11),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#4b5563')),
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ]),
+        slip_salary_table=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('FONTSIZE', (0, 1), (-1, -1), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#fef3c7')),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]),
+        signature_table=TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 1), (-1, 1), 5),
+        ]),
+        history_summary_table=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fef3c7')),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 12),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('TOPPADDING', (0, 0), (-1, -1), 12),
+        ]),
+        history_transactions_table=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 10),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        all_summary_table=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#fef3c7'), colors.white]),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 10),
+        ]),
+        all_employee_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        all_financial_table=TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fef3c7')),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('TOPPADDING', (0, 0), (-1, -1), 8),
+        ]),
+        all_transactions_table=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#60a5fa')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#eff6ff')]),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ]),
+        all_attendance_table=TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('ALIGN', (1, 0), (1, -1), 'CENTER'),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#d1fae5')]),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TOPPADDING', (0, 0), (-1, -1), 6),
+        ]),
     )
 
-    title = Paragraph("RASS CUISINE RESTAURANT", title_style)
+
+@lru_cache(maxsize=None)
+def _brand_title_template(style_name):
+    from reportlab.platypus import Paragraph
+
+    return Paragraph("RASS CUISINE RESTAURANT", getattr(_pdf_styles(), style_name))
+
+
+def _brand_title(style_name):
+    """The restaurant title in one of the title styles, parsed once per style.
+
+    Flowables keep layout state while a document is built, so every caller
+    gets its own shallow copy of the prebuilt paragraph.
+    """
+    return copy.copy(_brand_title_template(style_name))
+
+
+class _PDFSink:
+    """Write target for SimpleDocTemplate.
+
+    ReportLab serializes the finished document in a single write() call, so
+    collecting that chunk directly avoids copying the whole PDF into a
+    growing BytesIO buffer.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(data)
+
+    def getvalue(self):
+        return b''.join(self._chunks)
+
+    def to_file(self):
+        """The PDF as a file object for send_file()"""
+        # BytesIO shares the bytes it is created from, so this does not copy the PDF
+        return BytesIO(self.getvalue())
+
+
+# Table cell formatting, called once per row in the PDF reports
+_MONTHS = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def _format_date(value, with_year=True):
+    """'05 Mar 2024' (or '05 Mar'), without going through strftime"""
+    if with_year:
+        return f"{value.day:02d} {_MONTHS[value.month - 1]} {value.year}"
+    return f"{value.day:02d} {_MONTHS[value.month - 1]}"
+
+
+# Table rows repeat the same times, so each one is formatted once
+@lru_cache(maxsize=512)
+def _format_time(value):
+    return value.strftime('%I:%M %p')
+
+
+def _truncate(notes, length):
+    """Notes cut to length characters with an ellipsis, or '-' when empty"""
+    if not notes:
+        return '-'
+    return notes[:length] + '...' if len(notes) > length else notes
+
+
+def _withdrawal_slip_elements(transaction, employee, generated_on):
+    """Build the flowables for one withdrawal slip"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Table, Paragraph, Spacer
+
+    elements = []
+    styles = _pdf_styles()
+
+    title = _brand_title('slip_title')
     elements.append(title)
 
-    subtitle = Paragraph("Salary Withdrawal Slip", styles['Heading2'])
+    subtitle = Paragraph("Salary Withdrawal Slip", styles.sheet['Heading2'])
     elements.append(subtitle)
     elements.append(Spacer(1, 0.3 * inch))
 
@@ -164,22 +503,15 @@ def generate_withdrawal_slip_pdf(transaction, employee):
     slip_data = [
         ['Slip No:', f"WS-{transaction.id:06d}"],
         ['Date & Time:', f"{transaction.date.strftime('%d %B %Y')} at {time_str}"],
-        ['Generated On:', get_pakistan_time().strftime('%d %B %Y, %I:%M %p')],
+        ['Generated On:', generated_on],
     ]
 
     slip_table = Table(slip_data, colWidths=[2 * inch, 4 * inch])
-    slip_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-    ]))
+    slip_table.setStyle(styles.slip_info_table)
     elements.append(slip_table)
     elements.append(Spacer(1, 0.3 * inch))
 
-    elements.append(Paragraph("Employee Information", heading_style))
+    elements.append(Paragraph("Employee Information", styles.slip_heading))
 
     emp_data = [
         ['Employee Name:', employee.name],
@@ -189,50 +521,27 @@ def generate_withdrawal_slip_pdf(transaction, employee):
     ]
 
     emp_table = Table(emp_data, colWidths=[2 * inch, 4 * inch])
-    emp_table.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 11),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.HexColor('#4b5563')),
-        ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    emp_table.setStyle(styles.slip_employee_table)
     elements.append(emp_table)
     elements.append(Spacer(1, 0.3 * inch))
 
-    elements.append(Paragraph("Salary Details", heading_style))
+    elements.append(Paragraph("Salary Details", styles.slip_heading))
 
     salary_data = [
         ['Description', 'Amount (Rs)'],
         ['Monthly Salary', f"{employee.salary:,.2f}"],
         ['Previous Withdrawals', f"{employee.total_withdrawn - transaction.amount:,.2f}"],
         ['Current Withdrawal', f"{transaction.amount:,.2f}"],
-        ['Remaining Balance', f"{employee.salary - employee.total_withdrawn:,.2f}"],
+        ['Remaining Balance', f"{employee.balance:,.2f}"],
     ]
 
     salary_table = Table(salary_data, colWidths=[3 * inch, 2 * inch])
-    salary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('FONTSIZE', (0, 1), (-1, -1), 11),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#fef3c7')),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-    ]))
+    salary_table.setStyle(styles.slip_salary_table)
     elements.append(salary_table)
     elements.append(Spacer(1, 0.3 * inch))
 
     if transaction.notes:
-        elements.append(Paragraph(f"<b>Notes:</b> {transaction.notes}", styles['Normal']))
+        elements.append(Paragraph(f"<b>Notes:</b> {transaction.notes}", styles.sheet['Normal']))
         elements.append(Spacer(1, 0.3 * inch))
 
     elements.append(Spacer(1, 0.5 * inch))
@@ -243,44 +552,62 @@ def generate_withdrawal_slip_pdf(transaction, employee):
     ]
 
     sig_table = Table(sig_data, colWidths=[3 * inch, 3 * inch])
-    sig_table.setStyle(TableStyle([
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 1), (-1, 1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 1), (-1, 1), 5),
-    ]))
+    sig_table.setStyle(styles.signature_table)
     elements.append(sig_table)
 
     elements.append(Spacer(1, 0.5 * inch))
     footer_text = "This is a computer-generated document. No signature required."
-    footer = Paragraph(f"<i>{footer_text}</i>", styles['Normal'])
+    footer = Paragraph(f"<i>{footer_text}</i>", styles.sheet['Normal'])
     elements.append(footer)
 
+    return elements
+
+
+def generate_withdrawal_slip_pdf(transaction, employee):
+    """Generate a withdrawal slip PDF for a single transaction"""
+    return generate_many_withdrawal_slips([transaction], employee)
+
+
+def generate_many_withdrawal_slips(transactions, employee=None):
+    """Generate one PDF with a page per withdrawal slip
+
+    Fonts, styles and the PDF structure are set up once for the whole batch
+    instead of once per slip. Each slip uses transaction.employee unless
+    employee is given.
+    """
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+
+    buffer = _PDFSink()
+    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
+    elements = []
+    generated_on = get_pakistan_time().strftime('%d %B %Y, %I:%M %p')
+
+    for transaction in transactions:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(_withdrawal_slip_elements(transaction, employee or transaction.employee, generated_on))
+
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return buffer.to_file()
 
 
 def generate_employee_history_pdf(employee):
     """Generate complete salary history PDF for an employee"""
-    buffer = BytesIO()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, LongTable, Paragraph, Spacer
+
+    buffer = _PDFSink()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
     elements = []
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#f97316'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
+    styles = _pdf_styles()
 
-    title = Paragraph("RASS CUISINE RESTAURANT", title_style)
+    title = _brand_title('report_title')
     elements.append(title)
 
-    subtitle = Paragraph("Employee Salary History Report", styles['Heading2'])
+    subtitle = Paragraph("Employee Salary History Report", styles.sheet['Heading2'])
     elements.append(subtitle)
     elements.append(Spacer(1, 0.2 * inch))
 
@@ -292,134 +619,117 @@ def generate_employee_history_pdf(employee):
     <b>Monthly Salary:</b> Rs {employee.salary:,.2f}<br/>
     <b>Report Generated:</b> {get_pakistan_time().strftime('%d %B %Y, %I:%M %p')}
     """
-    elements.append(Paragraph(emp_info, styles['Normal']))
+    elements.append(Paragraph(emp_info, styles.sheet['Normal']))
     elements.append(Spacer(1, 0.3 * inch))
 
     summary_data = [
         ['Total Salary', f"Rs {employee.salary:,.2f}"],
         ['Total Withdrawn', f"Rs {employee.total_withdrawn:,.2f}"],
-        ['Remaining Balance', f"Rs {employee.salary - employee.total_withdrawn:,.2f}"],
+        ['Remaining Balance', f"Rs {employee.balance:,.2f}"],
     ]
 
     summary_table = Table(summary_data, colWidths=[3 * inch, 2 * inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fef3c7')),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 12),
-        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('TOPPADDING', (0, 0), (-1, -1), 12),
-    ]))
+    summary_table.setStyle(styles.history_summary_table)
     elements.append(summary_table)
     elements.append(Spacer(1, 0.3 * inch))
 
     if employee.transactions:
-        elements.append(Paragraph("<b>Withdrawal History</b>", styles['Heading3']))
+        elements.append(Paragraph("<b>Withdrawal History</b>", styles.sheet['Heading3']))
         elements.append(Spacer(1, 0.1 * inch))
 
-        trans_data = [['Date', 'Time', 'Amount (Rs)', 'Notes']]
-        for trans in sorted(employee.transactions, key=lambda x: x.date, reverse=True):
-            trans_data.append([
-                trans.date.strftime('%d %b %Y'),
-                trans.time.strftime('%I:%M %p') if trans.time else 'N/A',
+        trans_data = [['Date', 'Time', 'Amount (Rs)', 'Notes']] + [
+            [
+                _format_date(trans.date),
+                _format_time(trans.time) if trans.time else 'N/A',
                 f"{trans.amount:,.2f}",
-                trans.notes[:30] + '...' if trans.notes and len(trans.notes) > 30 else (trans.notes or '-')
-            ])
+                _truncate(trans.notes, 30)
+            ]
+            for trans in employee.transactions
+        ]
 
-        trans_table = Table(trans_data, colWidths=[1.5 * inch, 1.2 * inch, 1.5 * inch, 2.3 * inch])
-        trans_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('ALIGN', (2, 1), (2, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        # LongTable paginates long histories without re-measuring every row on each page split
+        trans_table = LongTable(trans_data, colWidths=[1.5 * inch, 1.2 * inch, 1.5 * inch, 2.3 * inch], repeatRows=1)
+        trans_table.setStyle(styles.history_transactions_table)
         elements.append(trans_table)
     else:
-        elements.append(Paragraph("No withdrawal history available.", styles['Normal']))
+        elements.append(Paragraph("No withdrawal history available.", styles.sheet['Normal']))
 
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return buffer.to_file()
 
 
 def generate_all_employees_pdf():
     """Generate comprehensive PDF report for ALL employees with complete information"""
-    buffer = BytesIO()
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, Paragraph, Spacer, PageBreak
+
+    buffer = _PDFSink()
     doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
     elements = []
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=22,
-        textColor=colors.HexColor('#f97316'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
+    styles = _pdf_styles()
 
     # Main Title
-    title = Paragraph("RASS CUISINE RESTAURANT", title_style)
+    title = _brand_title('all_title')
     elements.append(title)
 
-    subtitle = Paragraph("Complete Employee Information Report", styles['Heading2'])
+    subtitle = Paragraph("Complete Employee Information Report", styles.sheet['Heading2'])
     elements.append(subtitle)
     elements.append(Spacer(1, 0.1 * inch))
 
     report_info = f"<b>Report Generated:</b> {get_pakistan_time().strftime('%d %B %Y, %I:%M %p')}"
-    elements.append(Paragraph(report_info, styles['Normal']))
+    elements.append(Paragraph(report_info, styles.sheet['Normal']))
     elements.append(Spacer(1, 0.3 * inch))
 
-    # Get all employees
-    employees = Employee.query.all()
-
-    # Summary Statistics
-    total_salaries = sum(emp.salary for emp in employees)
-    total_withdrawn = sum(emp.total_withdrawn for emp in employees)
-    total_remaining = total_salaries - total_withdrawn
+    # Summary Statistics (added up by the database)
+    total_employees, total_salaries, total_withdrawn, total_remaining = db.session.execute(_EMPLOYEE_TOTALS).one()
 
     summary_data = [
         ['Metric', 'Value'],
-        ['Total Employees', str(len(employees))],
+        ['Total Employees', str(total_employees)],
         ['Total Monthly Salaries', f"Rs {total_salaries:,.2f}"],
         ['Total Withdrawn', f"Rs {total_withdrawn:,.2f}"],
         ['Total Remaining', f"Rs {total_remaining:,.2f}"],
     ]
 
     summary_table = Table(summary_data, colWidths=[3 * inch, 2.5 * inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.HexColor('#fef3c7'), colors.white]),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 10),
-        ('TOPPADDING', (0, 0), (-1, -1), 10),
-    ]))
+    summary_table.setStyle(styles.all_summary_table)
     elements.append(summary_table)
     elements.append(Spacer(1, 0.4 * inch))
 
-    # Individual Employee Details
-    for idx, emp in enumerate(employees, 1):
+    # Attendance for the last 30 days, counted for all employees in one query
+    today = get_pakistan_date()
+    attendance_counts = _attendance_counts(today - timedelta(days=30), today)
+
+    # Each employee's five most recent withdrawals, ranked by the database in one query
+    ranked = select(
+        Transaction.employee_id,
+        Transaction.date,
+        Transaction.amount,
+        Transaction.notes,
+        func.row_number().over(
+            partition_by=Transaction.employee_id,
+            order_by=(Transaction.date.desc(), Transaction.id.desc())
+        ).label('rank')
+    ).subquery()
+    recent_by_employee = defaultdict(list)
+    for trans in db.session.execute(select(ranked).where(ranked.c.rank <= 5).order_by(ranked.c.rank)):
+        recent_by_employee[trans.employee_id].append(trans)
+
+    # Individual Employee Details (employees are read in batches rather than all at once)
+    for idx, emp in enumerate(Employee.query.order_by(Employee.id).yield_per(50), 1):
+        # Separator line
+        if idx > 1:
+            elements.append(Paragraph("_" * 80, styles.sheet['Normal']))
+            elements.append(Spacer(1, 0.2 * inch))
+
         # Page break after every 2 employees (except first)
         if idx > 1 and (idx - 1) % 2 == 0:
             elements.append(PageBreak())
 
         # Employee Header
         emp_header = f"<b>Employee #{idx}: {emp.name}</b>"
-        elements.append(Paragraph(emp_header, styles['Heading3']))
+        elements.append(Paragraph(emp_header, styles.sheet['Heading3']))
         elements.append(Spacer(1, 0.1 * inch))
 
         # Employee Basic Info
@@ -433,16 +743,7 @@ def generate_all_employees_pdf():
         ]
 
         emp_table = Table(emp_data, colWidths=[2 * inch, 3.5 * inch])
-        emp_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        emp_table.setStyle(styles.all_employee_table)
         elements.append(emp_table)
         elements.append(Spacer(1, 0.2 * inch))
 
@@ -450,73 +751,41 @@ def generate_all_employees_pdf():
         fin_data = [
             ['Monthly Salary', f"Rs {emp.salary:,.2f}"],
             ['Total Withdrawn', f"Rs {emp.total_withdrawn:,.2f}"],
-            ['Remaining Balance', f"Rs {emp.salary - emp.total_withdrawn:,.2f}"],
+            ['Remaining Balance', f"Rs {emp.balance:,.2f}"],
             ['Withdrawal Percentage', f"{(emp.total_withdrawn / emp.salary * 100):.1f}%" if emp.salary > 0 else '0%'],
         ]
 
         fin_table = Table(fin_data, colWidths=[2 * inch, 3.5 * inch])
-        fin_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#fef3c7')),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-        ]))
+        fin_table.setStyle(styles.all_financial_table)
         elements.append(fin_table)
         elements.append(Spacer(1, 0.2 * inch))
 
         # Recent Transactions (Last 5)
-        recent_trans = sorted(emp.transactions, key=lambda x: x.date, reverse=True)[:5]
+        recent_trans = recent_by_employee.get(emp.id)
         if recent_trans:
-            elements.append(Paragraph("<b>Recent Withdrawals (Last 5):</b>", styles['Normal']))
+            elements.append(Paragraph("<b>Recent Withdrawals (Last 5):</b>", styles.sheet['Normal']))
             elements.append(Spacer(1, 0.1 * inch))
 
-            trans_data = [['Date', 'Amount (Rs)', 'Notes']]
-            for trans in recent_trans:
-                trans_data.append([
-                    trans.date.strftime('%d %b %Y'),
-                    f"{trans.amount:,.2f}",
-                    (trans.notes[:25] + '...') if trans.notes and len(trans.notes) > 25 else (trans.notes or '-')
-                ])
+            trans_data = [['Date', 'Amount (Rs)', 'Notes']] + [
+                [_format_date(trans.date), f"{trans.amount:,.2f}", _truncate(trans.notes, 25)]
+                for trans in recent_trans
+            ]
 
             trans_table = Table(trans_data, colWidths=[1.5 * inch, 1.5 * inch, 2.5 * inch])
-            trans_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#60a5fa')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#eff6ff')]),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            trans_table.setStyle(styles.all_transactions_table)
             elements.append(trans_table)
         else:
-            elements.append(Paragraph("<i>No withdrawal history</i>", styles['Normal']))
+            elements.append(Paragraph("<i>No withdrawal history</i>", styles.sheet['Normal']))
 
         # Attendance Summary (Last 30 days)
-        today = get_pakistan_date()
-        start_date = today - timedelta(days=30)
-        attendance_records = Attendance.query.filter(
-            Attendance.employee_id == emp.id,
-            Attendance.date >= start_date,
-            Attendance.date <= today
-        ).all()
-
-        if attendance_records:
+        days = attendance_counts.get(emp.id)
+
+        if days:
             elements.append(Spacer(1, 0.2 * inch))
-            elements.append(Paragraph("<b>Attendance (Last 30 Days):</b>", styles['Normal']))
+            elements.append(Paragraph("<b>Attendance (Last 30 Days):</b>", styles.sheet['Normal']))
             elements.append(Spacer(1, 0.1 * inch))
 
-            present = sum(1 for r in attendance_records if r.status == 'Present')
-            absent = sum(1 for r in attendance_records if r.status == 'Absent')
-            leave = sum(1 for r in attendance_records if r.status == 'Leave')
-            half_day = sum(1 for r in attendance_records if r.status == 'Half-Day')
-            total = len(attendance_records)
+            present, absent, leave, half_day, total = days
             percentage = (present / total * 100) if total > 0 else 0
 
             att_data = [
@@ -530,118 +799,236 @@ def generate_all_employees_pdf():
             ]
 
             att_table = Table(att_data, colWidths=[2 * inch, 1.5 * inch])
-            att_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#10b981')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-                ('ALIGN', (1, 0), (1, -1), 'CENTER'),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#d1fae5')]),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-                ('TOPPADDING', (0, 0), (-1, -1), 6),
-            ]))
+            att_table.setStyle(styles.all_attendance_table)
             elements.append(att_table)
 
         elements.append(Spacer(1, 0.3 * inch))
 
-        # Separator line
-        if idx < len(employees):
-            elements.append(Paragraph("_" * 80, styles['Normal']))
-            elements.append(Spacer(1, 0.2 * inch))
-
     # Footer
     elements.append(Spacer(1, 0.3 * inch))
     footer = Paragraph(
         "<i>End of Report - RASS CUISINE Restaurant - Confidential</i>",
-        styles['Normal']
+        styles.sheet['Normal']
     )
     elements.append(footer)
 
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return buffer.to_file()
+
+
+def _month_date_range(month, year):
+    """Return (first day of the month, first day of the next month)"""
+    start_date = date(year, month, 1)
+    # Day 28 + 4 days always lands in the next month
+    end_date = (start_date.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start_date, end_date
 
 
 def generate_monthly_report_pdf(month, year):
-    """Generate monthly salary report for all employees"""
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5 * inch, bottomMargin=0.5 * inch)
-    elements = []
-    styles = getSampleStyleSheet()
-
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=20,
-        textColor=colors.HexColor('#f97316'),
-        spaceAfter=20,
-        alignment=TA_CENTER
-    )
+    """Generate monthly salary report for all employees
 
-    month_name = datetime(year, month, 1).strftime('%B %Y')
+    The transaction table is drawn straight onto the canvas. A Platypus Table
+    re-measures all remaining rows every time it splits across a page, which
+    makes busy months slow; here every row has the same height, so paging is
+    simple arithmetic and rows are drawn as they are read.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Paragraph
+
+    buffer = _PDFSink()
+    pdf = Canvas(buffer, pagesize=A4)
+    styles = _pdf_styles()
+
+    # Same frame as the other reports: 1 inch sides, 0.5 inch top/bottom, 6pt padding
+    page_width, page_height = A4
+    left = inch + 6
+    top = page_height - 0.5 * inch - 6
+    bottom = 0.5 * inch + 6
+    frame_width = page_width - 2 * left
+    y = top
+    prev_space_after = 0
+
+    def add_paragraph(para, space_after=0):
+        """Draw a paragraph below the previous one, spaced the way a Platypus frame would"""
+        nonlocal y, prev_space_after
+        if y < top:
+            y -= max(para.getSpaceBefore() - prev_space_after, 0)
+        height = para.wrap(frame_width, y - bottom)[1]
+        para.drawOn(pdf, left, y - height)
+        y -= height + para.getSpaceAfter() + space_after
+        prev_space_after = 0 if space_after else para.getSpaceAfter()
 
-    title = Paragraph("RASS CUISINE RESTAURANT", title_style)
-    elements.append(title)
+    month_name = datetime(year, month, 1).strftime('%B %Y')
 
-    subtitle = Paragraph(f"Monthly Salary Report - {month_name}", styles['Heading2'])
-    elements.append(subtitle)
-    elements.append(Spacer(1, 0.2 * inch))
+    add_paragraph(_brand_title('report_title'))
+    add_paragraph(Paragraph(f"Monthly Salary Report - {month_name}", styles.sheet['Heading2']), 0.2 * inch)
 
     report_info = f"<b>Report Generated:</b> {get_pakistan_time().strftime('%d %B %Y, %I:%M %p')}"
-    elements.append(Paragraph(report_info, styles['Normal']))
-    elements.append(Spacer(1, 0.3 * inch))
+    add_paragraph(Paragraph(report_info, styles.sheet['Normal']), 0.3 * inch)
 
     # Get all transactions for the month
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1)
+    start_date, end_date = _month_date_range(month, year)
+    in_month = (Transaction.date >= start_date, Transaction.date < end_date)
+
+    transaction_count, total_withdrawn = db.session.execute(
+        select(func.count(Transaction.id), func.coalesce(func.sum(Transaction.amount), 0)).where(*in_month)
+    ).one()
+
+    if transaction_count:
+        add_paragraph(Paragraph(f"<b>Total Withdrawals This Month:</b> Rs {total_withdrawn:,.2f}",
+                                styles.sheet['Heading3']))
+        add_paragraph(Paragraph(f"<b>Total Transactions:</b> {transaction_count}", styles.sheet['Normal']), 0.2 * inch)
+
+        # Only the columns the table shows; notes are cut in SQL to one character past the
+        # 20 shown, which is enough to tell whether they need an ellipsis
+        transactions = db.session.execute(
+            select(Transaction.date, Employee.name, Employee.designation, Transaction.amount,
+                   func.substr(Transaction.notes, 1, 21))
+            .join(Employee, Employee.id == Transaction.employee_id)
+            .where(*in_month)
+            .order_by(Transaction.date.desc())
+            .execution_options(yield_per=500)
+        )
+
+        # Column layout and colours match the Table style the report used before
+        col_widths = [1 * inch, 1.8 * inch, 1.5 * inch, 1.2 * inch, 1.5 * inch]
+        table_left = left + (frame_width - sum(col_widths)) / 2
+        col_edges = [table_left]
+        for width in col_widths:
+            col_edges.append(col_edges[-1] + width)
+        row_height = 24  # 12pt leading plus 6pt top and bottom padding
+        padding = 6
+        page_top = y
+
+        def draw_grid():
+            pdf.setStrokeColor(colors.grey)
+            pdf.setLineWidth(0.5)
+            for x in col_edges:
+                pdf.line(x, page_top, x, y)
+            line_y = page_top
+            while line_y >= y - 0.01:
+                pdf.line(col_edges[0], line_y, col_edges[-1], line_y)
+                line_y -= row_height
+
+        # Header row
+        y -= row_height
+        pdf.setFillColor(colors.HexColor('#f97316'))
+        pdf.rect(col_edges[0], y, col_edges[-1] - col_edges[0], row_height, stroke=0, fill=1)
+        pdf.setFillColor(colors.whitesmoke)
+        pdf.setFont('Helvetica-Bold', 9)
+        for i, heading in enumerate(('Date', 'Employee', 'Designation', 'Amount (Rs)', 'Notes')):
+            pdf.drawCentredString((col_edges[i] + col_edges[i + 1]) / 2, y + padding + 12 - 9, heading)
+
+        stripe = colors.HexColor('#f9fafb')
+        for row_number, (trans_date, name, designation, amount, notes) in enumerate(transactions):
+            if y - row_height < bottom:
+                draw_grid()
+                pdf.showPage()
+                y = page_top = top
+
+            y -= row_height
+            if row_number % 2:
+                pdf.setFillColor(stripe)
+                pdf.rect(col_edges[0], y, col_edges[-1] - col_edges[0], row_height, stroke=0, fill=1)
+
+            baseline = y + padding + 12 - 8
+            pdf.setFillColor(colors.black)
+            pdf.setFont('Helvetica', 8)
+            pdf.drawString(col_edges[0] + padding, baseline, _format_date(trans_date, with_year=False))
+            pdf.drawString(col_edges[1] + padding, baseline, name)
+            pdf.drawString(col_edges[2] + padding, baseline, designation)
+            pdf.drawRightString(col_edges[4] - padding, baseline, f"{amount:,.2f}")
+            pdf.drawString(col_edges[4] + padding, baseline, _truncate(notes, 20))
+
+        draw_grid()
     else:
-        end_date = date(year, month + 1, 1)
+        add_paragraph(Paragraph("No transactions found for this month.", styles.sheet['Normal']))
+
+    pdf.showPage()
+    pdf.save()
+    return buffer.to_file()
+
+
+# ============================================
+# PDF CACHE
+# ============================================
+
+# Rendered PDFs are cached per process. Each cache key carries a version of the
+# data the document shows, so any change to that data produces a new key.
+# Sizes count documents, not bytes, and every worker holds its own copy: slips are
+# a few KB each, but a long salary history runs to hundreds of KB, so histories
+# get a smaller cache (the monthly report cache holds 24).
+PDF_CACHE_SIZE = int(os.environ.get('PDF_CACHE_SIZE', 256))
+HISTORY_PDF_CACHE_SIZE = int(os.environ.get('HISTORY_PDF_CACHE_SIZE', 64))
+
+
+@lru_cache(maxsize=PDF_CACHE_SIZE)
+def _render_withdrawal_slip(transaction_id, employee_version):
+    """Return withdrawal slip bytes for a transaction and employee version"""
+    transaction = db.session.get(Transaction, transaction_id)
+    return generate_withdrawal_slip_pdf(transaction, transaction.employee).getvalue()
+
+
+def _withdrawal_slip_version(employee):
+    """Employee fields printed on a withdrawal slip (transactions themselves never change)"""
+    return (employee.name, employee.designation, employee.join_date, employee.salary, employee.total_withdrawn)
 
-    transactions = Transaction.query.filter(
+
+@lru_cache(maxsize=HISTORY_PDF_CACHE_SIZE)
+def _render_employee_history(employee_id, data_version):
+    """Return salary history bytes for an employee and data version"""
+    return generate_employee_history_pdf(db.session.get(Employee, employee_id)).getvalue()
+
+
+def _employee_history_version(employee):
+    """Employee fields printed on the history, plus the count and newest id of their transactions"""
+    transaction_count, newest_id = db.session.query(
+        func.count(Transaction.id),
+        func.max(Transaction.id)
+    ).filter(Transaction.employee_id == employee.id).one()
+    return _withdrawal_slip_version(employee) + (transaction_count, newest_id)
+
+
+@lru_cache(maxsize=24)
+def _render_monthly_report(month, year, data_version):
+    """Return monthly report bytes for a month and data version"""
+    return generate_monthly_report_pdf(month, year).getvalue()
+
+
+def _monthly_report_version(month, year):
+    """Count and newest id of the month's transactions, plus the last edit of their employees"""
+    start_date, end_date = _month_date_range(month, year)
+    return db.session.query(
+        func.count(Transaction.id),
+        func.max(Transaction.id),
+        func.max(Employee.updated_at)
+    ).join(Employee, Transaction.employee_id == Employee.id).filter(
         Transaction.date >= start_date,
         Transaction.date < end_date
-    ).order_by(Transaction.date.desc()).all()
+    ).one()._tuple()
 
-    if transactions:
-        total_withdrawn = sum(t.amount for t in transactions)
-        elements.append(
-            Paragraph(f"<b>Total Withdrawals This Month:</b> Rs {total_withdrawn:,.2f}", styles['Heading3']))
-        elements.append(Paragraph(f"<b>Total Transactions:</b> {len(transactions)}", styles['Normal']))
-        elements.append(Spacer(1, 0.2 * inch))
 
-        trans_data = [['Date', 'Employee', 'Designation', 'Amount (Rs)', 'Notes']]
-        for trans in transactions:
-            trans_data.append([
-                trans.date.strftime('%d %b'),
-                trans.employee.name,
-                trans.employee.designation,
-                f"{trans.amount:,.2f}",
-                trans.notes[:20] + '...' if trans.notes and len(trans.notes) > 20 else (trans.notes or '-')
-            ])
-
-        trans_table = Table(trans_data, colWidths=[1 * inch, 1.8 * inch, 1.5 * inch, 1.2 * inch, 1.5 * inch])
-        trans_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f97316')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('ALIGN', (3, 1), (3, -1), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(trans_table)
+def _send_cached_pdf(cache_key, render, filename):
+    """Send a cached PDF with an ETag; a client that already has this version gets a 304 without rendering"""
+    etag = hashlib.md5(repr(cache_key).encode()).hexdigest()
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
     else:
-        elements.append(Paragraph("No transactions found for this month.", styles['Normal']))
-
-    doc.build(elements)
-    buffer.seek(0)
-    return buffer
+        response = send_file(
+            BytesIO(render()),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name=filename,
+            etag=etag
+        )
+    # Only the logged-in user's browser may keep a copy, and it must revalidate before reuse
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
 
 
 # ============================================
@@ -681,6 +1068,10 @@ def login():
         user = User.query.filter_by(username=username).first()
 
         if user and user.check_password(password):
+            # Upgrade hashes made with older settings while the plain password is at hand
+            if user.needs_rehash():
+                user.set_password(password)
+                db.session.commit()
             login_user(user)
             flash('Login successful!', 'success')
             return redirect(url_for('dashboard'))
@@ -701,31 +1092,44 @@ def logout():
 @app.route('/dashboard')
 @login_required
 def dashboard():
-    employees = Employee.query.order_by(Employee.id).all()  # ✅ Sort by ID
-    transactions = Transaction.query.order_by(Transaction.created_at.desc()).limit(10).all()
+    # ✅ Sort by ID, one page at a time
+    pagination = db.paginate(_DASHBOARD_EMPLOYEES, per_page=EMPLOYEES_PER_PAGE, error_out=False)
+    if not pagination.items and pagination.page > 1:
+        # Stale page link (e.g. after a delete): go to the last page that exists
+        return redirect(url_for('dashboard', page=pagination.pages or None))
+    # ✅ Join each employee into the same query
+    transactions = db.session.execute(
+        _RECENT_TRANSACTIONS.options(joinedload(Transaction.employee))
+    ).scalars().all()
+
+    total_employees, total_salaries, total_withdrawn, total_remaining = db.session.execute(_EMPLOYEE_TOTALS).one()
 
     stats = {
-        'total_employees': len(employees),
-        'total_salaries': sum(emp.salary for emp in employees),
-        'total_withdrawn': sum(emp.total_withdrawn for emp in employees),
-        'total_remaining': sum(emp.salary - emp.total_withdrawn for emp in employees)
+        'total_employees': total_employees,
+        'total_salaries': float(total_salaries),
+        'total_withdrawn': float(total_withdrawn),
+        'total_remaining': float(total_remaining)
     }
 
-    return render_template('dashboard.html', stats=stats, transactions=transactions, employees=employees)
+    return render_template('dashboard.html', stats=stats, transactions=transactions,
+                           employees=pagination.items, pagination=pagination)
 
 
 @app.route('/employees')
 @login_required
 def employees():
     search = request.args.get('search', '')
+    stmt = _EMPLOYEES_BY_ID  # ✅ Sort by ID
     if search:
-        employees = Employee.query.filter(
-            (Employee.name.contains(search)) | (Employee.designation.contains(search))
-        ).order_by(Employee.id).all()  # ✅ Sort by ID
-    else:
-        employees = Employee.query.order_by(Employee.id).all()  # ✅ Sort by ID
+        # ✅ ILIKE: case-insensitive, and served by the pg_trgm index on PostgreSQL
+        pattern = f'%{search}%'
+        stmt = stmt.where(or_(Employee.name.ilike(pattern), Employee.designation.ilike(pattern)))
+    pagination = db.paginate(stmt, per_page=EMPLOYEES_PER_PAGE, error_out=False)
+    if not pagination.items and pagination.page > 1:
+        # Stale page link (e.g. after a delete): go to the last page that exists
+        return redirect(url_for('employees', page=pagination.pages or None, search=search or None))
 
-    return render_template('employees.html', employees=employees, search=search)
+    return render_template('employees.html', employees=pagination.items, pagination=pagination, search=search)
 
 
 @app.route('/employee/add', methods=['POST'])
@@ -798,7 +1202,7 @@ def get_employee_data(id):
         'name': employee.name,
         'designation': employee.designation,
         'salary': employee.salary,
-        'join_date': employee.join_date.strftime('%Y-%m-%d')
+        'join_date': employee.join_date.isoformat()
     })
 
 
@@ -806,17 +1210,22 @@ def get_employee_data(id):
 @login_required
 def add_withdrawal():
     employee_id = int(request.form['employee_id'])
-    employee = db.session.get(Employee, employee_id)
-    if not employee:
-        flash('Employee not found', 'error')
-        return redirect(url_for('employees'))
 
     try:
         amount = float(request.form['amount'])
-        remaining = employee.salary - employee.total_withdrawn
 
-        if amount > remaining:
-            flash('Withdrawal amount exceeds remaining salary!', 'error')
+        # Check the balance and deduct in one UPDATE so concurrent withdrawals can't overdraw
+        result = db.session.execute(
+            update(Employee)
+            .where(Employee.id == employee_id, Employee.balance >= amount)
+            .values(total_withdrawn=Employee.total_withdrawn + amount)
+        )
+        if result.rowcount == 0:
+            db.session.rollback()
+            if db.session.get(Employee, employee_id) is None:
+                flash('Employee not found', 'error')
+            else:
+                flash('Withdrawal amount exceeds remaining salary!', 'error')
             return redirect(url_for('employees'))
 
         pakistan_time = get_pakistan_time()
@@ -829,7 +1238,6 @@ def add_withdrawal():
             notes=request.form.get('notes', '')
         )
 
-        employee.total_withdrawn += amount
         db.session.add(transaction)
         db.session.commit()
         flash('Withdrawal recorded successfully!', 'success')
@@ -840,31 +1248,51 @@ def add_withdrawal():
     return redirect(url_for('employees'))
 
 
+CSV_CHUNK_SIZE = 64 * 1024
+
+
+def _csv_chunks(rows):
+    """Write rows as CSV, yielding UTF-8 bytes in chunks of about CSV_CHUNK_SIZE characters.
+
+    Rows are buffered as text and each chunk is encoded in one call, which is cheaper
+    than encoding row by row through a TextIOWrapper.
+    """
+    output = StringIO()
+    writer = csv.writer(output)
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= CSV_CHUNK_SIZE:
+            yield output.getvalue().encode('utf-8')
+            output.seek(0)
+            output.truncate()
+    if output.tell():
+        yield output.getvalue().encode('utf-8')
+
+
 @app.route('/export/csv')
 @login_required
 def export_csv():
-    employees = Employee.query.all()
+    def generate():
+        yield ['Name', 'Designation', 'Join Date', 'Total Salary', 'Withdrawn', 'Remaining']
+        # ✅ Only the columns written to the file
+        for emp in Employee.query.options(load_only(
+            Employee.name, Employee.designation, Employee.join_date,
+            Employee.salary, Employee.total_withdrawn, Employee.balance
+        )).yield_per(500):
+            yield [
+                emp.name,
+                emp.designation,
+                emp.join_date.isoformat(),
+                emp.salary,
+                emp.total_withdrawn,
+                emp.balance
+            ]
 
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Name', 'Designation', 'Join Date', 'Total Salary', 'Withdrawn', 'Remaining'])
-
-    for emp in employees:
-        writer.writerow([
-            emp.name,
-            emp.designation,
-            emp.join_date.strftime('%Y-%m-%d'),
-            emp.salary,
-            emp.total_withdrawn,
-            emp.salary - emp.total_withdrawn
-        ])
-
-    output.seek(0)
-    return send_file(
-        BytesIO(output.getvalue().encode()),
+    filename = f'RASS_Salary_Report_{datetime.now().strftime("%Y%m%d")}.csv'
+    return Response(
+        stream_with_context(_csv_chunks(generate())),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'RASS_Salary_Report_{datetime.now().strftime("%Y%m%d")}.csv'
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 
 
@@ -876,15 +1304,19 @@ def change_password():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
 
-        if not current_user.check_password(old_password):
+        user = db.session.get(User, current_user.id)
+
+        if not user.check_password(old_password):
             flash('Current password is incorrect', 'error')
         elif new_password != confirm_password:
             flash('New passwords do not match', 'error')
         elif len(new_password) < 6:
             flash('Password must be at least 6 characters', 'error')
         else:
-            current_user.set_password(new_password)
+            user.set_password(new_password)
             db.session.commit()
+            with _USER_CACHE_LOCK:
+                _USER_CACHE.pop(user.id, None)
             flash('Password changed successfully!', 'success')
             return redirect(url_for('dashboard'))
 
@@ -896,21 +1328,19 @@ def change_password():
 @login_required
 def download_withdrawal_slip(transaction_id):
     """Download PDF slip for a specific withdrawal"""
-    transaction = db.session.get(Transaction, transaction_id)
+    transaction = db.session.get(Transaction, transaction_id, options=[joinedload(Transaction.employee)])
     if not transaction:
         flash('Transaction not found', 'error')
         return redirect(url_for('employees'))
 
     employee = transaction.employee
-    pdf_buffer = generate_withdrawal_slip_pdf(transaction, employee)
-
+    version = _withdrawal_slip_version(employee)
     filename = f"Withdrawal_Slip_{employee.name.replace(' ', '_')}_{transaction.date.strftime('%Y%m%d')}.pdf"
 
-    return send_file(
-        pdf_buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return _send_cached_pdf(
+        ('slip', transaction.id, version),
+        lambda: _render_withdrawal_slip(transaction.id, version),
+        filename
     )
 
 
@@ -923,15 +1353,13 @@ def download_employee_history(employee_id):
         flash('Employee not found', 'error')
         return redirect(url_for('employees'))
 
-    pdf_buffer = generate_employee_history_pdf(employee)
-
+    version = _employee_history_version(employee)
     filename = f"Salary_History_{employee.name.replace(' ', '_')}_{datetime.now().strftime('%Y%m%d')}.pdf"
 
-    return send_file(
-        pdf_buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=filename
+    return _send_cached_pdf(
+        ('history', employee.id, version),
+        lambda: _render_employee_history(employee.id, version),
+        filename
     )
 
 
@@ -963,16 +1391,44 @@ def monthly_reports():
 @login_required
 def download_monthly_report():
     """Download monthly salary report PDF"""
-    month = int(request.args.get('month', datetime.now().month))
-    year = int(request.args.get('year', datetime.now().year))
-
-    pdf_buffer = generate_monthly_report_pdf(month, year)
+    pakistan_now = get_pakistan_datetime()
+    month = int(request.args.get('month', pakistan_now.month))
+    year = int(request.args.get('year', pakistan_now.year))
 
+    version = _monthly_report_version(month, year)
     month_name = datetime(year, month, 1).strftime('%B_%Y')
     filename = f"Monthly_Salary_Report_{month_name}.pdf"
 
+    return _send_cached_pdf(
+        ('monthly', month, year, version),
+        lambda: _render_monthly_report(month, year, version),
+        filename
+    )
+
+
+@app.route('/reports/monthly/slips')
+@login_required
+def download_monthly_slips():
+    """Download every withdrawal slip of a month as one PDF"""
+    pakistan_now = get_pakistan_datetime()
+    month = int(request.args.get('month', pakistan_now.month))
+    year = int(request.args.get('year', pakistan_now.year))
+    start_date, end_date = _month_date_range(month, year)
+
+    transactions = Transaction.query.options(joinedload(Transaction.employee)).filter(
+        Transaction.date >= start_date,
+        Transaction.date < end_date
+    ).order_by(Transaction.date, Transaction.id).all()
+
+    if not transactions:
+        flash('No withdrawals found for this month', 'error')
+        return redirect(url_for('monthly_reports'))
+
+    month_name = datetime(year, month, 1).strftime('%B_%Y')
+    filename = f"Withdrawal_Slips_{month_name}.pdf"
+
     return send_file(
-        pdf_buffer,
+        generate_many_withdrawal_slips(transactions),
         mimetype='application/pdf',
         as_attachment=True,
         download_name=filename
@@ -1013,7 +1469,7 @@ def attendance():
     """Show attendance marking page"""
     today = get_pakistan_date()
 
-    selected_date_str = request.args.get('date', today.strftime('%Y-%m-%d'))
+    selected_date_str = request.args.get('date', today.isoformat())
     try:
         selected_date = datetime.strptime(selected_date_str, '%Y-%m-%d').date()
     except:
@@ -1041,43 +1497,43 @@ def mark_attendance():
     try:
         date_str = request.form.get('date')
         attendance_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-        pakistan_time = get_pakistan_time()
 
-        employees = Employee.query.all()
-        marked_count = 0
-
-        for employee in employees:
-            status = request.form.get(f'status_{employee.id}')
-
-            if status:
-                existing = Attendance.query.filter_by(
-                    employee_id=employee.id,
-                    date=attendance_date
-                ).first()
-
-                check_in = request.form.get(f'check_in_{employee.id}')
-                check_out = request.form.get(f'check_out_{employee.id}')
-                notes = request.form.get(f'notes_{employee.id}', '')
-
-                if existing:
-                    existing.status = status
-                    existing.check_in_time = datetime.strptime(check_in, '%H:%M').time() if check_in else None
-                    existing.check_out_time = datetime.strptime(check_out, '%H:%M').time() if check_out else None
-                    existing.notes = notes
-                    existing.marked_by = current_user.username
-                else:
-                    attendance = Attendance(
-                        employee_id=employee.id,
-                        date=attendance_date,
-                        status=status,
-                        check_in_time=datetime.strptime(check_in, '%H:%M').time() if check_in else None,
-                        check_out_time=datetime.strptime(check_out, '%H:%M').time() if check_out else None,
-                        notes=notes,
-                        marked_by=current_user.username
-                    )
-                    db.session.add(attendance)
-
-                marked_count += 1
+        # ✅ Read the submitted statuses from the form, then check only those ids exist
+        submitted = {
+            int(key[len('status_'):]): status
+            for key, status in request.form.items()
+            if key.startswith('status_') and key[len('status_'):].isdigit() and status
+        }
+        existing_ids = db.session.execute(
+            select(Employee.id).where(Employee.id.in_(submitted))
+        ).scalars().all() if submitted else []
+
+        rows = []
+        for employee_id in existing_ids:
+            check_in = request.form.get(f'check_in_{employee_id}')
+            check_out = request.form.get(f'check_out_{employee_id}')
+
+            rows.append({
+                'employee_id': employee_id,
+                'date': attendance_date,
+                'status': submitted[employee_id],
+                'check_in_time': datetime.strptime(check_in, '%H:%M').time() if check_in else None,
+                'check_out_time': datetime.strptime(check_out, '%H:%M').time() if check_out else None,
+                'notes': request.form.get(f'notes_{employee_id}', ''),
+                'marked_by': current_user.username
+            })
+
+        # ✅ Insert or update every row in one statement (ON CONFLICT on unique_employee_date)
+        if rows:
+            insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+            stmt = insert(Attendance).values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['employee_id', 'date'],
+                set_={column: stmt.excluded[column]
+                      for column in ('status', 'check_in_time', 'check_out_time', 'notes', 'marked_by')}
+            )
+            db.session.execute(stmt)
+        marked_count = len(rows)
 
         db.session.commit()
         flash(f'Attendance marked successfully for {marked_count} employees!', 'success')
@@ -1104,18 +1560,23 @@ def attendance_report():
     start_date = date(year, month, 1)
     end_date = date(year, month, days_in_month)
 
+    # ✅ One query for the whole month, bucketed per employee
+    records_by_employee = defaultdict(list)
+    for record in Attendance.query.filter(
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ):
+        records_by_employee[record.employee_id].append(record)
+
     attendance_data = {}
     for employee in employees:
-        records = Attendance.query.filter(
-            Attendance.employee_id == employee.id,
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
-        ).all()
+        records = records_by_employee[employee.id]
 
-        present_count = sum(1 for r in records if r.status == 'Present')
-        absent_count = sum(1 for r in records if r.status == 'Absent')
-        leave_count = sum(1 for r in records if r.status == 'Leave')
-        half_day_count = sum(1 for r in records if r.status == 'Half-Day')
+        status_counts = Counter(r.status for r in records)
+        present_count = status_counts['Present']
+        absent_count = status_counts['Absent']
+        leave_count = status_counts['Leave']
+        half_day_count = status_counts['Half-Day']
 
         daily_records = {r.date.day: r for r in records}
 
@@ -1157,10 +1618,11 @@ def employee_attendance_history(employee_id):
     ).order_by(Attendance.date.desc()).all()
 
     total_days = len(records)
-    present_count = sum(1 for r in records if r.status == 'Present')
-    absent_count = sum(1 for r in records if r.status == 'Absent')
-    leave_count = sum(1 for r in records if r.status == 'Leave')
-    half_day_count = sum(1 for r in records if r.status == 'Half-Day')
+    status_counts = Counter(r.status for r in records)
+    present_count = status_counts['Present']
+    absent_count = status_counts['Absent']
+    leave_count = status_counts['Leave']
+    half_day_count = status_counts['Half-Day']
 
     stats = {
         'total': total_days,
@@ -1188,47 +1650,34 @@ def download_attendance_report(month, year):
     start_date = date(year, month, 1)
     end_date = date(year, month, days_in_month)
 
-    employees = Employee.query.order_by(Employee.name).all()
+    def generate():
+        yield [f'RASS CUISINE - Attendance Report - {start_date.strftime("%B %Y")}']
+        yield []
+        yield ['Employee', 'Present', 'Absent', 'Leave', 'Half-Day', 'Total Days', 'Attendance %']
 
-    output = StringIO()
-    writer = csv.writer(output)
+        # ✅ Status counts for every employee come from a single GROUP BY
+        attendance_counts = _attendance_counts(start_date, end_date)
 
-    writer.writerow([f'RASS CUISINE - Attendance Report - {start_date.strftime("%B %Y")}'])
-    writer.writerow([])
-    writer.writerow(['Employee', 'Present', 'Absent', 'Leave', 'Half-Day', 'Total Days', 'Attendance %'])
+        for employee in Employee.query.order_by(Employee.name).yield_per(500):
+            present, absent, leave, half_day, total = attendance_counts.get(employee.id, (0, 0, 0, 0, 0))
+            percentage = (present / total * 100) if total > 0 else 0
+
+            yield [
+                employee.name,
+                present,
+                absent,
+                leave,
+                half_day,
+                total,
+                f"{percentage:.1f}%"
+            ]
 
-    for employee in employees:
-        records = Attendance.query.filter(
-            Attendance.employee_id == employee.id,
-            Attendance.date >= start_date,
-            Attendance.date <= end_date
-        ).all()
-
-        present = sum(1 for r in records if r.status == 'Present')
-        absent = sum(1 for r in records if r.status == 'Absent')
-        leave = sum(1 for r in records if r.status == 'Leave')
-        half_day = sum(1 for r in records if r.status == 'Half-Day')
-        total = len(records)
-        percentage = (present / total * 100) if total > 0 else 0
-
-        writer.writerow([
-            employee.name,
-            present,
-            absent,
-            leave,
-            half_day,
-            total,
-            f"{percentage:.1f}%"
-        ])
-
-    output.seek(0)
     month_name = date(year, month, 1).strftime('%B_%Y')
 
-    return send_file(
-        BytesIO(output.getvalue().encode()),
+    return Response(
+        stream_with_context(_csv_chunks(generate())),
         mimetype='text/csv',
-        as_attachment=True,
-        download_name=f'Attendance_Report_{month_name}.csv'
+        headers={'Content-Disposition': f'attachment; filename=Attendance_Report_{month_name}.csv'}
     )
 
 
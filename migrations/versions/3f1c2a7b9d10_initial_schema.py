@@ -0,0 +1,77 @@
+"""Initial schema
+
+Revision ID: 3f1c2a7b9d10
+Revises:
+Create Date: 2026-10-15 09:00:00
+
+Databases created before migrations were introduced already have these
+tables (from db.create_all()), so each table is only created if missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'user' not in existing:
+        op.create_table(
+            'user',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(length=80), nullable=False, unique=True),
+            sa.Column('password_hash', sa.String(length=200))
+        )
+
+    if 'employee' not in existing:
+        op.create_table(
+            'employee',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('designation', sa.String(length=100), nullable=False),
+            sa.Column('salary', sa.Float(), nullable=False),
+            sa.Column('join_date', sa.Date(), nullable=False),
+            sa.Column('total_withdrawn', sa.Float()),
+            sa.Column('created_at', sa.DateTime())
+        )
+
+    if 'transaction' not in existing:
+        op.create_table(
+            'transaction',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('employee_id', sa.Integer(), sa.ForeignKey('employee.id', ondelete='CASCADE'),
+                      nullable=False),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('notes', sa.String(length=500)),
+            sa.Column('created_at', sa.DateTime())
+        )
+
+    if 'attendance' not in existing:
+        op.create_table(
+            'attendance',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('employee_id', sa.Integer(), sa.ForeignKey('employee.id', ondelete='CASCADE'),
+                      nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('check_in_time', sa.Time()),
+            sa.Column('check_out_time', sa.Time()),
+            sa.Column('notes', sa.String(length=500)),
+            sa.Column('marked_by', sa.String(length=80)),
+            sa.Column('created_at', sa.DateTime()),
+            sa.UniqueConstraint('employee_id', 'date', name='unique_employee_date')
+        )
+
+
+def downgrade():
+    op.drop_table('attendance')
+    op.drop_table('transaction')
+    op.drop_table('employee')
+    op.drop_table('user')
@@ -0,0 +1,41 @@
+"""Add salary_payment_date, updated_at and transaction time
+
+Revision ID: 8a4e6d2c5b31
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-15 09:05:00
+
+These are the columns migrate_database.py used to add by hand.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4e6d2c5b31'
+down_revision = '3f1c2a7b9d10'
+branch_labels = None
+depends_on = None
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    employee_columns = _columns('employee')
+    if 'salary_payment_date' not in employee_columns:
+        op.add_column('employee', sa.Column('salary_payment_date', sa.Date(), nullable=True))
+    if 'updated_at' not in employee_columns:
+        op.add_column('employee', sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute('UPDATE employee SET updated_at = created_at WHERE updated_at IS NULL')
+
+    if 'time' not in _columns('transaction'):
+        op.add_column('transaction', sa.Column('time', sa.Time(), nullable=True))
+        # Existing withdrawals get 12:00 PM
+        op.execute("UPDATE \"transaction\" SET time = '12:00:00' WHERE time IS NULL")
+
+
+def downgrade():
+    op.drop_column('transaction', 'time')
+    op.drop_column('employee', 'updated_at')
+    op.drop_column('employee', 'salary_payment_date')
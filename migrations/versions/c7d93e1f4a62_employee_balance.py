@@ -0,0 +1,30 @@
+"""Add the computed employee balance column
+
+Revision ID: c7d93e1f4a62
+Revises: 8a4e6d2c5b31
+Create Date: 2026-10-15 09:10:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d93e1f4a62'
+down_revision = '8a4e6d2c5b31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('employee')}
+    if 'balance' not in columns:
+        # SQLite can only add VIRTUAL generated columns to an existing table
+        persisted = bind.dialect.name != 'sqlite'
+        op.add_column('employee', sa.Column('balance', sa.Float(),
+                                            sa.Computed('salary - total_withdrawn', persisted=persisted)))
+
+
+def downgrade():
+    op.drop_column('employee', 'balance')
@@ -0,0 +1,56 @@
+"""Add indexes used by reports, the dashboard and employee search
+
+Revision ID: e2b8f05a7c94
+Revises: c7d93e1f4a62
+Create Date: 2026-10-15 09:15:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8f05a7c94'
+down_revision = 'c7d93e1f4a62'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_transaction_date', 'transaction', ['date']),
+    ('ix_transaction_created_at', 'transaction', ['created_at']),
+    ('ix_transaction_employee_date', 'transaction', ['employee_id', 'date']),
+    ('ix_employee_name', 'employee', ['name']),
+    ('ix_employee_designation', 'employee', ['designation']),
+    ('ix_attendance_date', 'attendance', ['date']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    def existing(table):
+        return {index['name'] for index in inspector.get_indexes(table)}
+
+    # Superseded by ix_transaction_employee_date
+    if 'ix_transaction_employee_id' in existing('transaction'):
+        op.drop_index('ix_transaction_employee_id', table_name='transaction')
+
+    for name, table, columns in INDEXES:
+        if name not in existing(table):
+            op.create_index(name, table, columns)
+
+    # Trigram index so the '%search%' filter on the employees page can use an index
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        if 'ix_employee_search_trgm' not in existing('employee'):
+            op.create_index('ix_employee_search_trgm', 'employee', ['name', 'designation'],
+                            postgresql_using='gin',
+                            postgresql_ops={'name': 'gin_trgm_ops', 'designation': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_employee_search_trgm', table_name='employee')
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)